@@ -1,5 +1,4 @@
 #!/bin/sh
 python ./manage.py migrate
-python ./manage.py runserver 0.0.0.0:8000
 
-gunicorn mysite.wsgi:application --bind 0.0.0.0:8000
+exec gunicorn mysite.wsgi:application
@@ -0,0 +1,27 @@
+"""Gunicorn settings, read automatically when gunicorn starts in this directory."""
+import os
+
+from decouple import config
+
+bind = config('GUNICORN_BIND', default='0.0.0.0:8000')
+
+# CPUs this process may run on. Unlike cpu_count(), this honours the CPU set
+# of a container, although not a CPU quota.
+if hasattr(os, 'sched_getaffinity'):
+    cpus = len(os.sched_getaffinity(0))
+else:
+    cpus = os.cpu_count() or 1
+
+# The polls views spend their time waiting on the database, so each worker runs
+# several threads that can serve other requests while one waits on a query.
+# Every thread keeps its own database connection (see CONN_MAX_AGE), so the
+# number of workers is capped to keep workers * threads within a connection
+# budget, well below PostgreSQL's default max_connections of 100.
+db_connections = config('GUNICORN_DB_CONNECTIONS', cast=int, default=60)
+
+worker_class = 'gthread'
+threads = config('GUNICORN_THREADS', cast=int, default=4)
+workers = config(
+    'GUNICORN_WORKERS', cast=int,
+    default=max(1, min(cpus + 1, db_connections // threads)),
+)
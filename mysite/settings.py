@@ -79,9 +79,36 @@ DATABASES = {
         'PASSWORD': config('DATABASE_PASSWORD', default='password'),
         'HOST': config('DATABASE_HOST', default='localhost'),
         'PORT': config('DATABASE_PORT', default='5432'),
+        # Keep connections open between requests instead of reconnecting each time
+        'CONN_MAX_AGE': config('DATABASE_CONN_MAX_AGE', cast=int, default=60),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Share the cache between worker processes through Redis when REDIS_URL is set,
+# otherwise keep a per-process in-memory cache. Set REDIS_URL when running more
+# than one gunicorn worker: with the in-memory cache, a question change only
+# clears the cached index page of the process that saved it, and the other
+# workers show the old list for up to 30 seconds.
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -129,6 +156,9 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Log logins, logouts and failed logins to the polls logger
+POLLS_LOG_AUTH_EVENTS = config('POLLS_LOG_AUTH_EVENTS', cast=bool, default=True)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -1,6 +1,46 @@
+import atexit
+import copy
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
 from django.apps import AppConfig
+from django.conf import settings
+
+
+class DeferredFormatQueueHandler(QueueHandler):
+    """Queue records unformatted, leaving all formatting to the listener thread."""
+
+    def prepare(self, record):
+        """Return a copy of the record without formatting its message or traceback."""
+        return copy.copy(record)
 
 
 class PollsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'polls'
+
+    def ready(self):
+        from . import signals
+
+        if getattr(settings, 'POLLS_LOG_AUTH_EVENTS', True):
+            signals.connect_auth_receivers()
+        self.start_log_listener()
+
+    def start_log_listener(self):
+        """
+        Move output of the polls logger to a background thread.
+
+        Records are put on a queue by the request thread and formatted and
+        written by the handlers configured in settings.LOGGING from a
+        listener thread.
+        """
+        logger = logging.getLogger(self.name)
+        handlers = logger.handlers
+        if not handlers or any(isinstance(handler, QueueHandler) for handler in handlers):
+            return
+        log_queue = queue.Queue(-1)
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        logger.handlers = [DeferredFormatQueueHandler(log_queue)]
+        listener.start()
+        atexit.register(listener.stop)
@@ -0,0 +1,34 @@
+# Generated by Django 5.1 on 2026-10-15 18:22
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_votes(apps, schema_editor):
+    """Backfill Choice.votes from the existing Vote rows."""
+    Choice = apps.get_model('polls', 'Choice')
+    Vote = apps.get_model('polls', 'Vote')
+    vote_counts = (
+        Vote.objects.filter(choice=OuterRef('pk'))
+        .values('choice')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Choice.objects.update(votes=Coalesce(Subquery(vote_counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_remove_choice_votes_vote'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='choice',
+            name='votes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_votes, migrations.RunPython.noop),
+    ]
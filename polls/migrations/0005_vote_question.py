@@ -0,0 +1,41 @@
+# Generated by Django 5.1 on 2026-10-15 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_question_from_choice(apps, schema_editor):
+    """Fill Vote.question from the question of the chosen choice."""
+    Choice = apps.get_model('polls', 'Choice')
+    Vote = apps.get_model('polls', 'Vote')
+    Vote.objects.update(
+        question=Subquery(
+            Choice.objects.filter(pk=OuterRef('choice_id')).values('question_id')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+    # The backfill leaves deferred foreign key checks pending on polls_vote,
+    # which PostgreSQL must run before it can alter the table again. Running
+    # each operation in its own transaction lets them complete in between.
+    atomic = False
+
+    dependencies = [
+        ('polls', '0004_choice_votes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vote',
+            name='question',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='polls.question'),
+        ),
+        migrations.RunPython(copy_question_from_choice, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='vote',
+            name='question',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='polls.question'),
+        ),
+    ]
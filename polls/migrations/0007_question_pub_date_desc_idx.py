@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-15 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0006_vote_uniq_user_question_vote'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['-pub_date'], name='question_pub_date_desc_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-15 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0007_question_pub_date_desc_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='choice',
+            name='votes',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
@@ -4,6 +4,8 @@ from django.db import models
 from django.utils import timezone
 from django.contrib.auth.models import User
 
+ONE_DAY = datetime.timedelta(days=1)
+
 
 class Question(models.Model):
     """Represents a poll question in the application."""
@@ -12,23 +14,28 @@ class Question(models.Model):
     pub_date = models.DateTimeField('date published', default=timezone.now)
     end_date = models.DateTimeField(null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-pub_date'], name='question_pub_date_desc_idx'),
+        ]
+
     def __str__(self):
         return self.question_text
 
     def was_published_recently(self):
         """Determine if the question was published within the last day."""
         now = timezone.now()
-        return now - datetime.timedelta(days=1) <= self.pub_date <= now
+        return now - ONE_DAY <= self.pub_date <= now
 
-    def is_published(self):
-        """Check if the question is currently published."""
-        return timezone.now() >= self.pub_date
+    def is_published(self, now=None):
+        """Check if the question is published at `now` (default: the current time)."""
+        now = now or timezone.now()
+        return now >= self.pub_date
 
-    def can_vote(self):
-        """Check if voting is currently allowed for the question."""
-        if self.end_date is None:
-            return timezone.now() >= self.pub_date
-        return self.pub_date <= timezone.now() <= self.end_date
+    def can_vote(self, now=None):
+        """Check if voting is allowed at `now` (default: the current time)."""
+        now = now or timezone.now()
+        return self.is_published(now) and (self.end_date is None or now <= self.end_date)
 
 
 class Choice(models.Model):
@@ -36,19 +43,22 @@ class Choice(models.Model):
 
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     choice_text = models.CharField(max_length=200)
-    votes = models.IntegerField(default=0)
+    # Denormalized count of Vote rows, kept in sync when votes are cast.
+    # Not editable, so admin forms cannot overwrite it with a stale total.
+    votes = models.IntegerField(default=0, editable=False)
 
     def __str__(self):
         return str(self.choice_text) if self.choice_text is not None else ''
 
-    @property
-    def votes(self):
-        """Get the total number of votes for this choice."""
-        return self.vote_set.all().count()
-
 
 class Vote(models.Model):
     """Record a choice for a question made by a user."""
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
     choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'question'], name='uniq_user_question_vote'),
+        ]
@@ -0,0 +1,81 @@
+"""Signal receivers that log auth events and keep derived poll data up to date."""
+import logging
+
+from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Choice, Question, Vote
+from .views import INDEX_CACHE_KEY
+
+logger = logging.getLogger('polls')
+
+
+@receiver(post_save, sender=Vote)
+def count_created_vote(sender, instance, created, **kwargs):
+    """Add a new vote, including one loaded from a fixture, to the count of its choice."""
+    if created:
+        Choice.objects.filter(pk=instance.choice_id).update(votes=F('votes') + 1)
+
+
+@receiver(post_save, sender=Choice)
+def recount_loaded_choice(sender, instance, raw, **kwargs):
+    """Recount the votes of a choice loaded from a fixture, which overwrites the counter."""
+    if raw:
+        Choice.objects.filter(pk=instance.pk).update(
+            votes=Vote.objects.filter(choice=instance.pk).count()
+        )
+
+
+@receiver(post_delete, sender=Vote)
+def uncount_deleted_vote(sender, instance, **kwargs):
+    """Remove a deleted vote from the count of its choice."""
+    Choice.objects.filter(pk=instance.choice_id).update(votes=F('votes') - 1)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def clear_index_cache(sender, **kwargs):
+    """Drop the cached index page questions when a question changes."""
+    cache.delete(INDEX_CACHE_KEY)
+
+
+def get_client_ip(request):
+    """Get the visitor’s IP address using request headers."""
+    if x_forwarded_for := request.META.get('HTTP_X_FORWARDED_FOR'):
+        return x_forwarded_for.partition(',')[0].strip()
+    return request.META.get('REMOTE_ADDR')
+
+
+def log_user_login(sender, request, user, **kwargs):
+    """Log the user login event."""
+    ip_address = get_client_ip(request)
+    logger.info('User %s logged in from %s', user.username, ip_address)
+
+
+def log_user_logout(sender, request, user, **kwargs):
+    """Log the user logout event."""
+    ip_address = get_client_ip(request)
+    logger.info('User %s logged out from %s', user.username, ip_address)
+
+
+def log_failed_login(sender, credentials, request, **kwargs):
+    """Log the failed login attempt."""
+    ip_address = get_client_ip(request)
+    username = credentials.get('username', 'unknown')
+    logger.warning('User %s login failed from %s', username, ip_address)
+
+
+def connect_auth_receivers():
+    """
+    Connect the auth event loggers.
+
+    Login and logout are only logged at INFO level, so their receivers are
+    left unconnected when the polls logger would discard them anyway.
+    """
+    user_login_failed.connect(log_failed_login, dispatch_uid='polls.log_failed_login')
+    if logger.isEnabledFor(logging.INFO):
+        user_logged_in.connect(log_user_login, dispatch_uid='polls.log_user_login')
+        user_logged_out.connect(log_user_logout, dispatch_uid='polls.log_user_logout')
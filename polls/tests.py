@@ -1,12 +1,20 @@
 import datetime
-
-from django.test import TestCase
+import logging
+from operator import itemgetter
+
+from django.apps import apps
+from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.urls import reverse
 from django.contrib.auth.models import User
 from mysite import settings
 
-from .models import Question, Choice
+from .models import Question, Choice, Vote
+from .signals import connect_auth_receivers, get_client_ip
 
 
 class QuestionModelTests(TestCase):
@@ -75,6 +83,14 @@ class QuestionModelTests(TestCase):
         question = Question(pub_date=timezone.now(), end_date=past_end_date)
         self.assertFalse(question.can_vote())
 
+    def test_can_vote_at_given_time(self):
+        """can_vote() checks the voting period against the time it is given."""
+        pub_date = timezone.now()
+        question = Question(pub_date=pub_date, end_date=pub_date + datetime.timedelta(days=1))
+        self.assertFalse(question.can_vote(pub_date - datetime.timedelta(hours=1)))
+        self.assertTrue(question.can_vote(pub_date + datetime.timedelta(hours=1)))
+        self.assertFalse(question.can_vote(pub_date + datetime.timedelta(days=2)))
+
 
 def create_question(question_text, days):
     """
@@ -87,6 +103,11 @@ def create_question(question_text, days):
 
 
 class QuestionIndexViewTests(TestCase):
+
+    def setUp(self):
+        """Start each test without index page questions cached by an earlier test."""
+        cache.clear()
+
     def test_no_questions(self):
         """If no questions exist, an appropriate message is displayed."""
         response = self.client.get(reverse("polls:index"))
@@ -98,9 +119,11 @@ class QuestionIndexViewTests(TestCase):
         """Questions with a pub_date in the past are displayed on the index page."""
         question = create_question(question_text="Past question.", days=-30)
         response = self.client.get(reverse("polls:index"))
+        self.assertContains(response, question.question_text)
         self.assertQuerySetEqual(
             response.context["latest_question_list"],
-            [question],
+            [question.id],
+            transform=itemgetter("id"),
         )
 
     def test_future_question(self):
@@ -121,7 +144,19 @@ class QuestionIndexViewTests(TestCase):
         response = self.client.get(reverse("polls:index"))
         self.assertQuerySetEqual(
             response.context["latest_question_list"],
-            [question],
+            [question.id],
+            transform=itemgetter("id"),
+        )
+
+    def test_new_question_replaces_cached_list(self):
+        """A newly published question appears even if the index page was cached."""
+        self.client.get(reverse("polls:index"))
+        question = create_question(question_text="Past question.", days=-1)
+        response = self.client.get(reverse("polls:index"))
+        self.assertQuerySetEqual(
+            response.context["latest_question_list"],
+            [question.id],
+            transform=itemgetter("id"),
         )
 
     def test_two_past_questions(self):
@@ -131,7 +166,8 @@ class QuestionIndexViewTests(TestCase):
         response = self.client.get(reverse("polls:index"))
         self.assertQuerySetEqual(
             response.context["latest_question_list"],
-            [question2, question1],
+            [question2.id, question1.id],
+            transform=itemgetter("id"),
         )
 
 
@@ -148,6 +184,121 @@ class QuestionDetailViewTests(TestCase):
         response = self.client.get(url)
         self.assertContains(response, past_question.question_text)
 
+    def test_past_question_is_fetched_once(self):
+        """The detail view loads the question in a single query."""
+        past_question = create_question(question_text="Past Question.", days=-5)
+        url = reverse("polls:detail", args=(past_question.id,))
+        with self.assertNumQueries(2):
+            # One query for the question and one for its choices
+            self.client.get(url)
+
+    def test_future_question(self):
+        """The detail view of a question that is not yet published redirects to the index page."""
+        future_question = create_question(question_text="Future Question.", days=5)
+        url = reverse("polls:detail", args=(future_question.id,))
+        response = self.client.get(url)
+        self.assertRedirects(response, reverse("polls:index"))
+
+    def test_ended_question(self):
+        """The detail view of a question whose voting period has ended redirects to the index page."""
+        ended_question = create_question(question_text="Ended Question.", days=-5)
+        ended_question.end_date = timezone.now() - datetime.timedelta(days=1)
+        ended_question.save()
+        url = reverse("polls:detail", args=(ended_question.id,))
+        response = self.client.get(url)
+        self.assertRedirects(response, reverse("polls:index"))
+
+
+class QuestionResultsViewTests(TestCase):
+
+    def test_vote_counts_are_displayed(self):
+        """The results page shows the number of votes for each choice."""
+        question = create_question(question_text="Past Question.", days=-5)
+        choice = question.choice_set.create(choice_text="Popular")
+        question.choice_set.create(choice_text="Unpopular")
+        vote_url = reverse("polls:vote", args=(question.id,))
+        for n in range(3):
+            user = User.objects.create_user(username=f"voter{n}", password="FatChance!")
+            self.client.force_login(user)
+            self.client.post(vote_url, {"choice": choice.id})
+        response = self.client.get(reverse("polls:results", args=(question.id,)))
+        self.assertEqual(response.status_code, 200)
+        counts = {c.choice_text: c.votes for c in response.context["question"].choice_set.all()}
+        self.assertEqual(counts, {"Popular": 3, "Unpopular": 0})
+
+    def test_vote_counts_need_no_query_per_choice(self):
+        """The results page reads all vote counts from the prefetched choices."""
+        question = create_question(question_text="Past Question.", days=-5)
+        Choice.objects.bulk_create(
+            [Choice(choice_text=f"Choice {n}", question=question, votes=n) for n in range(5)]
+        )
+        with self.assertNumQueries(2):
+            # One query for the question and one for its choices
+            self.client.get(reverse("polls:results", args=(question.id,)))
+
+    def test_nonexistent_question(self):
+        """The results view of an unknown question redirects to the index page."""
+        response = self.client.get(reverse("polls:results", args=(999,)))
+        self.assertRedirects(response, reverse("polls:index"))
+
+
+class GetClientIpTests(TestCase):
+
+    def test_first_forwarded_address(self):
+        """get_client_ip() returns the first address in X-Forwarded-For."""
+        request = RequestFactory().get("/", HTTP_X_FORWARDED_FOR="10.0.0.1, 10.0.0.2")
+        self.assertEqual(get_client_ip(request), "10.0.0.1")
+
+    def test_remote_address_without_proxy(self):
+        """get_client_ip() falls back to REMOTE_ADDR without X-Forwarded-For."""
+        request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.3")
+        self.assertEqual(get_client_ip(request), "10.0.0.3")
+
+
+class AuthReceiverTests(TestCase):
+
+    def setUp(self):
+        """Start each test with the auth event loggers disconnected."""
+        self.disconnect_auth_receivers()
+        self.addCleanup(connect_auth_receivers)
+        self.addCleanup(self.disconnect_auth_receivers)
+
+    def disconnect_auth_receivers(self):
+        """Disconnect the auth event loggers, returning which ones were connected."""
+        return {
+            'login': user_logged_in.disconnect(dispatch_uid='polls.log_user_login'),
+            'logout': user_logged_out.disconnect(dispatch_uid='polls.log_user_logout'),
+            'failed': user_login_failed.disconnect(dispatch_uid='polls.log_failed_login'),
+        }
+
+    def test_all_receivers_connected_by_default(self):
+        """All auth event loggers are connected when the polls logger logs INFO."""
+        apps.get_app_config('polls').ready()
+        self.assertEqual(
+            self.disconnect_auth_receivers(),
+            {'login': True, 'logout': True, 'failed': True},
+        )
+
+    @override_settings(POLLS_LOG_AUTH_EVENTS=False)
+    def test_no_receivers_when_disabled(self):
+        """No auth event loggers are connected when POLLS_LOG_AUTH_EVENTS is False."""
+        apps.get_app_config('polls').ready()
+        self.assertEqual(
+            self.disconnect_auth_receivers(),
+            {'login': False, 'logout': False, 'failed': False},
+        )
+
+    def test_only_failed_login_receiver_above_info(self):
+        """Only failed logins are logged when the polls logger is above INFO."""
+        logger = logging.getLogger('polls')
+        self.addCleanup(logger.setLevel, logger.level)
+        logger.setLevel(logging.WARNING)
+        connect_auth_receivers()
+        self.assertEqual(
+            self.disconnect_auth_receivers(),
+            {'login': False, 'logout': False, 'failed': True},
+        )
+
 
 class UserAuthTest(TestCase):
 
@@ -169,11 +320,10 @@ class UserAuthTest(TestCase):
         self.user1.save()
         # we need a poll question to test voting
         q = Question.objects.create(question_text="First Poll Question")
-        q.save()
         # a few choices
-        for n in range(1, 4):
-            choice = Choice(choice_text=f"Choice {n}", question=q)
-            choice.save()
+        Choice.objects.bulk_create(
+            [Choice(choice_text=f"Choice {n}", question=q) for n in range(1, 4)]
+        )
         self.question = q
 
     def test_logout(self):
@@ -215,7 +365,7 @@ class UserAuthTest(TestCase):
         choice1 = self.question.choice_set.first()
         vote_url = reverse('polls:vote', args=[self.question.id])
         response = self.client.post(vote_url, {"choice": choice1.id})
-        self.assertRedirects(response, reverse('polls:results', args=[self.question.id]))
+        self.assertRedirects(response, reverse('polls:results', args=[self.question.id]), status_code=303)
 
         # Verify one vote recorded
         self.assertEqual(self.user1.vote_set.count(), 1)
@@ -224,9 +374,113 @@ class UserAuthTest(TestCase):
         # Submit a second vote for a different choice
         choice2 = self.question.choice_set.last()
         response = self.client.post(vote_url, {"choice": choice2.id})
-        self.assertRedirects(response, reverse('polls:results', args=[self.question.id]))
+        self.assertRedirects(response, reverse('polls:results', args=[self.question.id]), status_code=303)
 
         # Verify the vote has changed to the new choice
         self.assertEqual(self.user1.vote_set.count(), 1)
-        self.assertEqual(choice1.vote_set.count(), 0)
+        self.assertFalse(choice1.vote_set.exists())
         self.assertEqual(choice2.vote_set.count(), 1)
+
+        # Verify the vote counts moved with the vote
+        choice1.refresh_from_db()
+        choice2.refresh_from_db()
+        self.assertEqual(choice1.votes, 0)
+        self.assertEqual(choice2.votes, 1)
+
+    def test_detail_view_shows_previous_vote(self):
+        """The detail view tells the template which choice the user voted for."""
+        self.client.login(username=self.username, password=self.password)
+        choice = self.question.choice_set.last()
+        self.client.post(reverse('polls:vote', args=[self.question.id]), {"choice": choice.id})
+        response = self.client.get(reverse('polls:detail', args=[self.question.id]))
+        self.assertEqual(response.context["user_vote"], choice.id)
+
+    def test_vote_loads_choice_and_question_together(self):
+        """Changing a vote loads the choice and its question in one query."""
+        self.client.login(username=self.username, password=self.password)
+        vote_url = reverse('polls:vote', args=[self.question.id])
+        self.client.post(vote_url, {"choice": self.question.choice_set.first().id})
+        new_choice = self.question.choice_set.last()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(vote_url, {"choice": new_choice.id})
+        selects = [query["sql"] for query in queries if query["sql"].startswith("SELECT")]
+        choice_selects = [
+            sql for sql in selects
+            if 'FROM "polls_choice" INNER JOIN "polls_question"' in sql
+        ]
+        self.assertEqual(len(choice_selects), 1)
+        self.assertFalse(any('FROM "polls_question"' in sql for sql in selects))
+
+    def test_repeating_the_same_vote_counts_it_once(self):
+        """Voting again for the same choice does not change its vote count."""
+        self.client.login(username=self.username, password=self.password)
+        choice = self.question.choice_set.first()
+        vote_url = reverse('polls:vote', args=[self.question.id])
+        self.client.post(vote_url, {"choice": choice.id})
+        self.client.post(vote_url, {"choice": choice.id})
+        choice.refresh_from_db()
+        self.assertEqual(choice.votes, 1)
+
+    def test_vote_without_choice_is_rejected(self):
+        """Submitting the vote form without a valid choice redirects back to the poll."""
+        self.client.login(username=self.username, password=self.password)
+        vote_url = reverse('polls:vote', args=[self.question.id])
+        detail_url = reverse('polls:detail', args=[self.question.id])
+        self.assertRedirects(self.client.post(vote_url, {}), detail_url, status_code=303)
+        self.assertRedirects(
+            self.client.post(vote_url, {"choice": "abc"}), detail_url, status_code=303
+        )
+        self.assertRedirects(
+            self.client.post(vote_url, {"choice": "²"}), detail_url, status_code=303
+        )
+        self.assertFalse(self.user1.vote_set.exists())
+
+    def test_vote_for_choice_of_another_question_is_rejected(self):
+        """A choice that belongs to a different question is not counted."""
+        self.client.login(username=self.username, password=self.password)
+        other_question = create_question(question_text="Other Question.", days=-1)
+        other_choice = other_question.choice_set.create(choice_text="Other Choice")
+        vote_url = reverse('polls:vote', args=[self.question.id])
+        response = self.client.post(vote_url, {"choice": other_choice.id})
+        self.assertRedirects(response, reverse('polls:detail', args=[self.question.id]), status_code=303)
+        other_choice.refresh_from_db()
+        self.assertEqual(other_choice.votes, 0)
+        self.assertFalse(self.user1.vote_set.exists())
+
+    def test_database_rejects_second_vote_for_question(self):
+        """The database allows only one vote per user per question."""
+        choice1 = self.question.choice_set.first()
+        choice2 = self.question.choice_set.last()
+        Vote.objects.create(user=self.user1, question=self.question, choice=choice1)
+        with self.assertRaises(IntegrityError):
+            Vote.objects.create(user=self.user1, question=self.question, choice=choice2)
+
+    def test_vote_created_outside_view_is_counted(self):
+        """Creating and deleting a vote through the ORM keeps its choice's count."""
+        choice = self.question.choice_set.first()
+        vote = Vote.objects.create(user=self.user1, question=self.question, choice=choice)
+        choice.refresh_from_db()
+        self.assertEqual(choice.votes, 1)
+        vote.delete()
+        choice.refresh_from_db()
+        self.assertEqual(choice.votes, 0)
+
+    def test_deleting_vote_updates_vote_count(self):
+        """Deleting a vote removes it from the vote count of its choice."""
+        self.client.login(username=self.username, password=self.password)
+        choice = self.question.choice_set.first()
+        self.client.post(reverse('polls:vote', args=[self.question.id]), {"choice": choice.id})
+        self.user1.vote_set.all().delete()
+        choice.refresh_from_db()
+        self.assertEqual(choice.votes, 0)
+
+    def test_loading_choice_keeps_vote_count(self):
+        """Reloading a choice from a fixture recounts its existing votes."""
+        self.client.login(username=self.username, password=self.password)
+        choice = self.question.choice_set.first()
+        self.client.post(reverse('polls:vote', args=[self.question.id]), {"choice": choice.id})
+        choice.votes = 0
+        # loaddata saves fixture objects with raw=True
+        choice.save_base(raw=True)
+        choice.refresh_from_db()
+        self.assertEqual(choice.votes, 1)
@@ -1,50 +1,35 @@
 import logging
-from django.http import HttpResponseRedirect
-from django.shortcuts import render, get_object_or_404, redirect
+from functools import lru_cache
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+from django.http import Http404, HttpResponseRedirect
+from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.views import generic
 from django.utils import timezone
 from django.contrib import messages
-from django.contrib.messages import get_messages
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
-from django.dispatch import receiver
+from django.core.cache import cache
 
 from .models import Question, Choice, Vote
 
 logger = logging.getLogger('polls')
 
+# Cache entry holding the questions shown on the index page
+INDEX_CACHE_KEY = 'polls:index:latest'
+INDEX_CACHE_TIMEOUT = 30
 
-def get_client_ip(request):
-    """Get the visitor’s IP address using request headers."""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
-@receiver(user_logged_in)
-def log_user_login(sender, request, user, **kwargs):
-    """Log the user login event."""
-    ip_address = get_client_ip(request)
-    logger.info(f'User {user.username} logged in from {ip_address}')
 
+class HttpResponseSeeOther(HttpResponseRedirect):
+    """Redirect with 303 See Other, which browsers always follow with a GET."""
 
-@receiver(user_logged_out)
-def log_user_logout(sender, request, user, **kwargs):
-    """Log the user logout event."""
-    ip_address = get_client_ip(request)
-    logger.info(f'User {user.username} logged out from {ip_address}')
+    status_code = 303
 
 
-@receiver(user_login_failed)
-def log_failed_login(sender, credentials, request, **kwargs):
-    """Log the failed login attempt."""
-    ip_address = get_client_ip(request)
-    username = credentials.get('username', 'unknown')
-    logger.warning(f'User {username} login failed from {ip_address}')
+@lru_cache(maxsize=1024)
+def cached_reverse(viewname, *args):
+    """Return the URL of a named view, reusing earlier lookups of the same URL."""
+    return reverse(viewname, args=args)
 
 
 class IndexView(generic.ListView):
@@ -57,8 +42,14 @@ class IndexView(generic.ListView):
     context_object_name = "latest_question_list"
 
     def get_queryset(self):
-        """Return the last five published questions."""
-        return Question.objects.filter(pub_date__lte=timezone.now()).order_by("-pub_date")[:5]
+        """Return the last five published questions, cached for a short time."""
+        return cache.get_or_set(
+            INDEX_CACHE_KEY,
+            lambda: list(Question.objects.filter(
+                pub_date__lte=timezone.now()
+            ).order_by("-pub_date").values('id', 'question_text')[:5]),
+            INDEX_CACHE_TIMEOUT,
+        )
 
 
 class DetailView(generic.DetailView):
@@ -67,59 +58,53 @@ class DetailView(generic.DetailView):
     model = Question
     template_name = "polls/detail.html"
 
-    # def get_queryset(self):
-    #     """
-    #     Return all published questions sorted by publication date from newest to oldest.
-    #     Excludes questions set to be published in the future.
-    #     """
-    #     # Filter questions to only include those published in the past or present
-    #     return Question.objects.filter(pub_date__lte=timezone.now()).order_by("-pub_date")
+    def get_queryset(self):
+        """Return questions annotated with whether they are published and open for voting."""
+        now = timezone.now()
+        published = Q(pub_date__lte=now)
+        return Question.objects.annotate(
+            published=ExpressionWrapper(published, output_field=BooleanField()),
+            votable=ExpressionWrapper(
+                published & (Q(end_date__isnull=True) | Q(end_date__gte=now)),
+                output_field=BooleanField(),
+            ),
+        )
 
     def get_context_data(self, **kwargs):
         """Get context data for rendering the detail view."""
         context = super().get_context_data(**kwargs)
-        question = self.get_object()
 
-        # Get the current user vote for this question
-        user_vote = None
+        # Get the choice that the current user has already voted for this question
+        context['user_vote'] = None
         if self.request.user.is_authenticated:
-            try:
-                # Get the choice that the user has already voted for this question
-                user_vote = Vote.objects.get(
-                    user=self.request.user, choice__question=question
-                )
-                context['user_vote'] = user_vote.choice.id
-            except Vote.DoesNotExist:
-                context['user_vote'] = None
-        else:
-            context['user_vote'] = None
+            context['user_vote'] = Vote.objects.filter(
+                user=self.request.user, question=self.object
+            ).values_list('choice_id', flat=True).first()
 
         return context
 
     def get(self, request, *args, **kwargs):
         """Handle GET requests for the detail view."""
-        # Use the filtered queryset from get_queryset to include only valid questions
-        # question = get_object_or_404(self.get_queryset(), pk=question_id)
         question_id = self.kwargs["pk"]
 
         try:
-            question = Question.objects.get(id=question_id)
-        except Question.DoesNotExist as ex:
-            logger.exception(f"Non-existent question {question_id} %s", ex)
+            self.object = question = self.get_object()
+        except Http404 as ex:
+            logger.exception("Non-existent question %s %s", question_id, ex)
             messages.warning(request, f"No question found with ID {question_id}")
-            return redirect('polls:index')
+            return HttpResponseRedirect(cached_reverse('polls:index'))
 
         # Check if the question is not published (past or present)
-        if not question.is_published():
+        if not question.published:
             messages.error(request, "This poll is not yet published.")
-            return redirect('polls:index')
+            return HttpResponseRedirect(cached_reverse('polls:index'))
 
         # Check if voting is allowed
-        if not question.can_vote():
+        if not question.votable:
             messages.error(request, "The voting period for this poll has ended.")
-            return redirect('polls:index')
+            return HttpResponseRedirect(cached_reverse('polls:index'))
 
-        return super().get(request, *args, **kwargs)
+        return self.render_to_response(self.get_context_data(object=question))
 
 
 class ResultsView(generic.DetailView):
@@ -128,73 +113,90 @@ class ResultsView(generic.DetailView):
     model = Question
     template_name = "polls/results.html"
 
+    def get_queryset(self):
+        """Return questions with their choices prefetched."""
+        return Question.objects.prefetch_related('choice_set')
+
     def get(self, request, *args, **kwargs):
         """Handle GET requests for the results view."""
         question_id = self.kwargs['pk']
         try:
-            question = Question.objects.get(pk=question_id)
-            return super().get(request, *args, **kwargs)
-        except Question.DoesNotExist:
-            logger.error(f"Non-existent question {question_id}")
+            self.object = self.get_object()
+        except Http404:
+            logger.error("Non-existent question %s", question_id)
             messages.error(request, f'No question found with ID {question_id}.')
-            return redirect('polls:index')
+            return HttpResponseRedirect(cached_reverse('polls:index'))
+        return self.render_to_response(self.get_context_data(object=self.object))
 
 
 @login_required
 def vote(request, question_id):
     """Handle user vote in a Django application."""
-    question = get_object_or_404(Question, pk=question_id)
+    # Fetch the selected choice together with its question in one query
+    choice_id = request.POST.get("choice", "")
+    selected_choice = None
+    if choice_id.isascii() and choice_id.isdigit():
+        selected_choice = Choice.objects.select_related('question').filter(
+            pk=choice_id, question_id=question_id
+        ).first()
+    if selected_choice is None:
+        question = get_object_or_404(Question, pk=question_id)
+    else:
+        question = selected_choice.question
+    now = timezone.now()
 
-    if not question.is_published():
+    if not question.is_published(now):
         messages.error(request, "This poll has not been published yet.")
-        return HttpResponseRedirect(reverse('polls:index'))
+        return HttpResponseSeeOther(cached_reverse('polls:index'))
 
-    if not question.can_vote():
+    if not question.can_vote(now):
         messages.error(request, "The voting period for this poll has ended.")
-        return HttpResponseRedirect(reverse('polls:detail', args=(question.id,)))
+        return HttpResponseSeeOther(cached_reverse('polls:detail', question.id))
 
-    try:
-        selected_choice = question.choice_set.get(pk=request.POST["choice"])
-    except (KeyError, Choice.DoesNotExist):
+    if selected_choice is None:
         messages.error(request, "You didn't select a choice.")
-        return HttpResponseRedirect(reverse('polls:detail', args=(question.id,)))
+        return HttpResponseSeeOther(cached_reverse('polls:detail', question.id))
 
     # Reference to the current user
     this_user = request.user
 
-    # Get the user's vote
+    # Move the user's earlier vote off its choice and record the new one
     try:
-        vote = this_user.vote_set.get(choice__question=question)
-        vote.choice = selected_choice
-        vote.save()
-        messages.success(
-            request,
-            f"Your vote was changed to '{selected_choice.choice_text}'"
-        )
-        logger.info(
-            f"{this_user.username} changed vote for question {question.id} "
-            f"to choice {selected_choice.id}"
-        )
-    except Vote.DoesNotExist:
-        Vote.objects.create(user=this_user, choice=selected_choice)
-        messages.success(request, f"You voted for '{selected_choice.choice_text}'")
-        logger.info(
-            f"{this_user.username} voted for question {question.id} choice "
-            f"{selected_choice.id}"
-        )
+        with transaction.atomic():
+            # Lock the user's vote on this question so that concurrent
+            # submissions by the same user adjust the counters one at a time
+            old_choice_id = Vote.objects.select_for_update().filter(
+                user=this_user, question=question
+            ).values_list('choice_id', flat=True).first()
+            created = old_choice_id is None
+            if created:
+                # Counted by the post_save receiver in polls/signals.py
+                Vote.objects.create(user=this_user, question=question, choice=selected_choice)
+            elif old_choice_id != selected_choice.pk:
+                # update() sends no signals, so move the count here
+                Vote.objects.filter(
+                    user=this_user, question=question
+                ).update(choice=selected_choice)
+                Choice.objects.filter(pk=old_choice_id).update(votes=F('votes') - 1)
+                Choice.objects.filter(pk=selected_choice.pk).update(votes=F('votes') + 1)
     except Exception as ex:
         logger.exception(
-            f"Exception occurred while voting for question {question.id} "
-            f"by user {this_user.username}: {str(ex)}"
+            "Exception occurred while voting for question %s by user %s: %s",
+            question.id, this_user.username, ex
+        )
+    else:
+        if created:
+            messages.success(request, f"You voted for '{selected_choice.choice_text}'")
+        else:
+            messages.success(
+                request,
+                f"Your vote was changed to '{selected_choice.choice_text}'"
+            )
+        logger.info(
+            "%s %s for question %s choice %s",
+            this_user.username, "voted" if created else "changed vote",
+            question.id, selected_choice.id
         )
 
     # Redirect to the results page after voting
-    return HttpResponseRedirect(reverse("polls:results", args=(question.id,)))
-
-
-def results(request, question_id):
-    """Display the results of a particular poll."""
-    question = get_object_or_404(Question, pk=question_id)
-    storage = get_messages(request)  # Get messages and remove them from the storage after display
-
-    return render(request, "polls/results.html", {'question': question, 'messages': storage})
+    return HttpResponseSeeOther(cached_reverse("polls:results", question.id))